@@ -94,20 +94,22 @@ def make_mutrel_from_trees_and_single_clustering(structs, llhs, counts, clusteri
   # 1. (naive) Represent the associated samples `C` separate times in the softmax
   # 2. (smart) Set `W' = W + log(C)`, as `exp(W') = Cexp(W)`
   weights = util.softmax(llhs + np.log(counts))
-  vids = None
+  K = len(structs[0]) + 1
+  soft_clustrel = np.zeros((K, K, NUM_MODELS))
+  flat_clustrel = soft_clustrel.reshape(-1, NUM_MODELS)
+  pair_idxs = np.arange(K * K)
 
   for struct, weight in zip(structs, weights):
     adjm = util.convert_parents_to_adjmatrix(struct)
-    crel = make_clustrel_from_cluster_adj(adjm)
-
-    if vids is None:
-      vids = crel.vids
-      soft_clustrel = np.zeros(crel.rels.shape)
-    else:
-      assert crel.vids == vids
-    soft_clustrel += weight * crel.rels
+    node_rels = util.compute_node_relations(adjm)
+    # `node_rels` gives the model index for every node pair, so we can scatter
+    # each tree's weight directly into the accumulator rather than
+    # materializing a one-hot (K, K, NUM_MODELS) tensor for every tree only to
+    # multiply and reduce it immediately afterward.
+    flat_clustrel[pair_idxs, node_rels.ravel()] += weight
 
   soft_clustrel = fix_rounding_errors(soft_clustrel)
+  vids = ['S%s' % (idx + 1) for idx in range(K)]
   clustrel = mutrel.Mutrel(rels=soft_clustrel, vids=vids)
   mrel = make_mutrel_from_clustrel(clustrel, clustering)
   return mrel
@@ -142,20 +144,14 @@ def make_clustrel_from_cluster_adj(cluster_adj):
   '''
   K = len(cluster_adj)
   assert cluster_adj.shape == (K, K)
-  cluster_anc = util.make_ancestral_from_adj(cluster_adj)
-  # In determining A_B relations, don't want to set mutations (i,j), where i
-  # and j are in same cluster, to 1.
-  assert np.all(1 == cluster_anc[0])
-  np.fill_diagonal(cluster_anc, 0)
-
-  clustrel = np.zeros((K, K, NUM_MODELS))
-  clustrel[:,:,Models.cocluster] = np.eye(K)
-  clustrel[:,:,Models.A_B] = cluster_anc
-  clustrel[:,:,Models.B_A] = clustrel[:,:,Models.A_B].T
-
-  existing = (Models.cocluster, Models.A_B, Models.B_A)
-  already_filled = np.sum(clustrel[:,:,existing], axis=2)
-  clustrel[already_filled == 0, Models.diff_branches] = 1
+  # `compute_node_relations` assigns each pair exactly one relation label, so
+  # expanding the labels into one-hot vectors fills every cell of the tensor
+  # in one pass -- no need to compute which cells remain "unfilled" before
+  # assigning `diff_branches`.
+  node_rels = util.compute_node_relations(cluster_adj)
+  # The root must be ancestral to every other node.
+  assert np.all(node_rels[0,1:] == Models.A_B)
+  clustrel = np.eye(NUM_MODELS)[node_rels]
 
   assert np.array_equal(np.ones((K,K)), np.sum(clustrel, axis=2))
   vids = ['S%s' % (idx + 1) for idx in range(K)]
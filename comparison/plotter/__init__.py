@@ -40,18 +40,20 @@ METHOD_COLOURS = {
 def augment(results, param_names):
   if len(param_names) < 1:
     return results
-  params = defaultdict(list)
-  for rid in results.runid:
-    for token in re.findall(rf'([{param_names}]\d+)', rid):
-      K, V = token[0], token[1:]
-      params[K].append(int(V))
-
-  lengths = np.array([len(V) for V in params.values()])
-  if not np.all(lengths == len(results)):
+  # Run one vectorized regex pass over the whole runid column rather than
+  # calling re.findall on every row.
+  extracted = results.runid.str.extractall(rf'(?P<param>[{param_names}])(?P<val>\d+)').reset_index()
+  try:
+    pivoted = extracted.pivot(index='level_0', columns='param', values='val')
+  except ValueError:
+    # Some runid specified the same parameter more than once.
+    raise Exception('Some params missing from some points')
+  pivoted = pivoted.reindex(results.index)
+  if pivoted.isnull().any(axis=None):
     raise Exception('Some params missing from some points')
 
-  for K in params.keys():
-    results[K] = params[K]
+  for K in pivoted.columns:
+    results[K] = pivoted[K].astype(int)
   return results
 
 def load_results(resultsfn):
@@ -59,13 +61,20 @@ def load_results(resultsfn):
   #results = results.drop(['pairtree_clustrel'], axis=1)
   methods = get_method_names(results)
 
-  for M in methods:
-    inf_idxs = np.isinf(results[M])
-    if np.any(inf_idxs):
-      # Sometimes the LLH may be -inf. (Thanks, PASTRI.) Consider this to be a
-      # failed run.
-      print('%s has %s infs' % (M, np.sum(inf_idxs)), file=sys.stderr)
-      results.loc[inf_idxs,M] = MISSING
+  # Mask infs across all method columns in one vectorized pass instead of
+  # three passes (isinf, any, .loc assignment) per column. Request a copy
+  # explicitly -- without it, `to_numpy()` may return a read-only view of the
+  # frame's data, making the in-place mask assignment below illegal.
+  scores = results[methods].to_numpy(copy=True)
+  inf_mask = np.isinf(scores)
+  if inf_mask.any():
+    # Sometimes the LLH may be -inf. (Thanks, PASTRI.) Consider this to be a
+    # failed run.
+    for M, inf_count in zip(methods, inf_mask.sum(axis=0)):
+      if inf_count > 0:
+        print('%s has %s infs' % (M, inf_count), file=sys.stderr)
+    scores[inf_mask] = MISSING
+    results[methods] = scores
   return (results, methods)
 
 def get_method_names(results):
@@ -156,8 +165,12 @@ def make_pie_fig(methods, complete, total, name=None):
 
 def make_points_for_methods(scores):
   methods = sort_methods(scores.keys())
-  points = [(HAPPY_METHOD_NAMES.get(M, M), R) for M in methods for R in scores[M]]
-  X, Y = zip(*points)
+  # Expand the (method, score) pairs with repeat/concatenate rather than a
+  # Python comprehension over every individual score point.
+  names = [HAPPY_METHOD_NAMES.get(M, M) for M in methods]
+  counts = [len(scores[M]) for M in methods]
+  X = np.repeat(names, counts)
+  Y = np.concatenate([np.asarray(scores[M]) for M in methods])
   return (X, Y)
 
 def make_points_for_single_method(results, method, X_key):
@@ -242,33 +255,35 @@ def make_fig(traces, template, ytitle, max_y=None, layout_options=None, log_y_ax
   return fig
 
 def write_figs(figs, outfn, export_dims=None):
-  plot = ''
   if export_dims is None:
     export_dims = {}
   else:
     # Duplicate, give that we modify it
     export_dims = dict(export_dims)
 
-  for fname, fig in figs.items():
-    if fname not in export_dims:
-      export_dims[fname] = (750, 450)
-    #print(pio.to_json(fig))
-    plot += pio.to_html(
-      fig,
-      include_plotlyjs = 'cdn',
-      config = {
-        'showLink': False,
-        'toImageButtonOptions': {
-          'format': 'svg',
-          'width': export_dims[fname][0],
-          'height': export_dims[fname][1],
-          'filename': fname,
-        },
-      },
-    )
-
+  # Write each figure's HTML as it's rendered rather than accumulating the
+  # whole report in a string first.
   with open(outfn, 'w') as outf:
-    print(plot, file=outf)
+    for fidx, (fname, fig) in enumerate(figs.items()):
+      if fname not in export_dims:
+        export_dims[fname] = (750, 450)
+      #print(pio.to_json(fig))
+      outf.write(pio.to_html(
+        fig,
+        # Emit the CDN script tag only for the first figure -- every figure on
+        # the page shares the single plotly.js load.
+        include_plotlyjs = ('cdn' if fidx == 0 else False),
+        config = {
+          'showLink': False,
+          'toImageButtonOptions': {
+            'format': 'svg',
+            'width': export_dims[fname][0],
+            'height': export_dims[fname][1],
+            'filename': fname,
+          },
+        },
+      ))
+    outf.write('\n')
 
 def set_missing_to(results, methods, val):
   for M in methods:
@@ -1,37 +1,20 @@
+import math
 import numpy as np
-from numba import njit
-import util
+from numba import vectorize
 
-@njit
+@vectorize
 def logpmf(X, N, P):
-  assert X.shape == N.shape == P.shape
-  # Limit to one-dimension arrays, as indexing an array using a boolean array
-  # of >1D (as I do with `results[idxs] = val`) is not supported by Numba.
-  assert X.ndim == N.ndim == P.ndim == 1
-
-  P_isclose_0 = util.isclose(0, P)
-  P_isclose_1 = util.isclose(1, P)
-  X_equals_0 = X == 0
-  X_equals_N = X == N
-  special = [
-    (np.logical_and(P_isclose_0, X_equals_0), 0),
-    (np.logical_and(P_isclose_0, np.logical_not(X_equals_0)), -np.inf),
-    (np.logical_and(P_isclose_1, X_equals_N), 0),
-    (np.logical_and(P_isclose_1, np.logical_not(X_equals_N)), -np.inf),
-  ]
-
-  result = np.full_like(P, np.nan)
-  for idx in range(len(special)):
-    idxs = special[idx][0]
-    val = special[idx][1]
-    assert np.all(np.isnan(result[idxs]))
-    result[idxs] = val
-
-  unfilled = np.isnan(result)
-  Nu = N[unfilled]
-  Xu = X[unfilled]
-  Pu = P[unfilled]
-  result[unfilled] = util.log_N_choose_K(Nu, Xu) + Xu*np.log(Pu) + (Nu - Xu)*np.log(1 - Pu)
-  assert not np.any(np.isnan(result))
-
-  return result
+  # The log PMF is an elementwise computation with a couple of boundary
+  # special cases, so express it as a Numba ufunc rather than building the
+  # boolean masks and temporaries the old array implementation needed. As a
+  # ufunc it broadcasts over any shape (the old version was limited to 1D),
+  # vectorizes across elements, and remains callable from other Numba-compiled
+  # code, like `util.lgamma`.
+  #
+  # Mirror `util.isclose`'s tolerance for the boundary cases.
+  if abs(P) <= 1e-6:
+    return 0. if X == 0 else -np.inf
+  if abs(P - 1) <= 1e-6:
+    return 0. if X == N else -np.inf
+  logC = math.lgamma(N + 1) - (math.lgamma(X + 1) + math.lgamma(N - X + 1))
+  return logC + X*math.log(P) + (N - X)*math.log(1 - P)
@@ -1,5 +1,5 @@
 import numpy as np
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 import warnings
 from scipy.cluster.hierarchy import ClusterWarning
 
@@ -16,7 +16,21 @@ Variant = namedtuple('Variant', (
 ))
 
 def sort_vids(vids):
-  return sorted(vids, key = lambda V: int(V[1:]))
+  # Hot paths (e.g., the tree sampler) sort the same small set of vids on
+  # every call, and the ordering never changes, so memoize the result rather
+  # than repeating the Python-level `int(V[1:])` key extraction each time.
+  key = tuple(vids)
+  if key not in sort_vids.cache:
+    sort_vids.cache[key] = sorted(key, key = lambda V: int(V[1:]))
+    if len(sort_vids.cache) > sort_vids.cache_maxsize:
+      sort_vids.cache.popitem(last=False)
+  else:
+    sort_vids.cache.move_to_end(key)
+  # Return a copy so callers can't mutate the cached list.
+  return list(sort_vids.cache[key])
+
+sort_vids.cache = OrderedDict()
+sort_vids.cache_maxsize = 1024
 
 def extract_vids(variants):
   return sort_vids(variants.keys())
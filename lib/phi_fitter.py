@@ -1,20 +1,30 @@
 import common
 import numpy as np
 import util
+from collections import OrderedDict
 
-def fit_phis(adj, superclusters, supervars, method, iterations, parallel):
+def fit_phis(adj, superclusters, supervars, method, iterations, parallel, eta_init=None):
   if method == 'debug':
     # Bypass cache when debugging.
     return _fit_phis(adj, superclusters, supervars, method, iterations, parallel)
-  key = (hash(adj.tobytes()), iterations)
+  # Key on the raw adjacency bytes rather than their hash (hashes can
+  # collide), and include the fitting parameters so that, e.g., `projection`
+  # and `rprop` results for the same tree don't shadow each other.
+  key = (adj.tobytes(), method, iterations)
   if key not in fit_phis.cache:
-    fit_phis.cache[key] = _fit_phis(adj, superclusters, supervars, method, iterations, parallel)
+    fit_phis.cache[key] = _fit_phis(adj, superclusters, supervars, method, iterations, parallel, eta_init)
     fit_phis.cache_misses += 1
+    # Evict the least-recently-used entry rather than letting the cache grow
+    # without bound over a long chain.
+    if len(fit_phis.cache) > fit_phis.cache_maxsize:
+      fit_phis.cache.popitem(last=False)
   else:
+    fit_phis.cache.move_to_end(key)
     fit_phis.cache_hits += 1
   return fit_phis.cache[key]
 
-fit_phis.cache = {}
+fit_phis.cache = OrderedDict()
+fit_phis.cache_maxsize = 4096
 fit_phis.cache_hits = 0
 fit_phis.cache_misses = 0
 
@@ -40,7 +50,7 @@ def _calc_llh(phi, V, N, omega_v, epsilon=1e-5):
   nlglh = np.sum(llh_per_sample) / S
   return (phi_llh, llh_per_sample, nlglh)
 
-def _fit_phis(adj, superclusters, supervars, method, iterations, parallel):
+def _fit_phis(adj, superclusters, supervars, method, iterations, parallel, eta_init=None):
   # Calling `import` on each function call should be cheap, as Python caches a
   # reference to the module after the first load.
   if method in ('graddesc_old', 'rprop_old'):
@@ -49,16 +59,21 @@ def _fit_phis(adj, superclusters, supervars, method, iterations, parallel):
 
   elif method == 'rprop':
     import phi_fitter_lol
-    eta = phi_fitter_lol.fit_etas(adj, superclusters, supervars, 'rprop', iterations, parallel, eta_init='mle')
+    # Warm-starting from a caller-supplied eta (typically the fit for the
+    # previous, closely related tree) lets the optimizer polish rather than
+    # re-optimize from scratch.
+    if eta_init is None:
+      eta_init = 'mle'
+    eta = phi_fitter_lol.fit_etas(adj, superclusters, supervars, 'rprop', iterations, parallel, eta_init=eta_init)
 
   elif method == 'projection':
     import phi_fitter_projection
-    eta = phi_fitter_projection.fit_etas(adj, superclusters, supervars)
+    eta = phi_fitter_projection.fit_etas(adj, superclusters, supervars, parallel)
 
   elif method == 'proj_rprop':
     import phi_fitter_projection
     import phi_fitter_lol
-    eta_proj = phi_fitter_projection.fit_etas(adj, superclusters, supervars)
+    eta_proj = phi_fitter_projection.fit_etas(adj, superclusters, supervars, parallel)
     eta = phi_fitter_lol.fit_etas(adj, superclusters, supervars, 'rprop', iterations, parallel, eta_init=eta_proj)
 
   elif method == 'debug':
@@ -70,7 +85,7 @@ def _fit_phis(adj, superclusters, supervars, method, iterations, parallel):
       #'rprop_init_mle': lambda: phi_fitter_iterative.fit_etas(adj, superclusters, supervars, 'rprop', iterations, parallel, eta_init=None),
       'lol_init_mle': lambda: phi_fitter_lol.fit_etas(adj, superclusters, supervars, 'rprop', iterations, parallel, eta_init='mle'),
       'lol_init_dirichlet': lambda: phi_fitter_lol.fit_etas(adj, superclusters, supervars, 'rprop', iterations, parallel, eta_init='dirichlet'),
-      'projection': lambda: phi_fitter_projection.fit_etas(adj, superclusters, supervars),
+      'projection': lambda: phi_fitter_projection.fit_etas(adj, superclusters, supervars, parallel),
     }
     #fitters['lol_init_proj'] = lambda: phi_fitter_lol.fit_etas(adj, superclusters, supervars, 'rprop', iterations, parallel, eta_init=fitters['projection']())
     #fitters['lol_init_prev'] = lambda: phi_fitter_lol.fit_etas(adj, superclusters, supervars, 'rprop', iterations, parallel, eta_init=last_eta[0])
@@ -124,6 +139,8 @@ def _fit_phis(adj, superclusters, supervars, method, iterations, parallel):
     raise Exception('Unknown phi fitter %s' % method)
 
   assert np.allclose(1, np.sum(eta, axis=0))
-  Z = util.make_ancestral_from_adj(adj)
+  # The tree sampler has typically just computed the ancestral matrix for this
+  # same adjacency, so take it from the shared cache.
+  Z = util.make_ancestral_from_adj_cached(adj)
   phi = np.dot(Z, eta)
   return (phi, eta)
@@ -16,13 +16,32 @@ def _convert_adjm_to_adjlist(adjm):
   np.fill_diagonal(adjm, 0)
   assert np.all(np.logical_or(adjm == 0, adjm == 1))
 
-  adjl = []
-  for I, row in enumerate(adjm):
-    adjl.append(np.flatnonzero(row))
+  # Scan the matrix once rather than calling flatnonzero on every row. `rows`
+  # is sorted, so searchsorted gives the offset where each row's neighbours
+  # begin.
+  M = len(adjm)
+  rows, cols = np.nonzero(adjm)
+  adjl = np.split(cols, np.searchsorted(rows, np.arange(1, M)))
 
   return adjl
 
-def fit_etas(adj, superclusters, supervars):
+def _make_adjl_arrays(adjm):
+  # The adjacency list and node degrees depend only on the tree, not on the
+  # sample being fit, so build them once per `fit_etas` call rather than once
+  # per sample.
+  adjl = _convert_adjm_to_adjlist(adjm)
+  M = len(adjl)
+  deg = np.array([len(children) for children in adjl], dtype=np.short)
+  adjl_mat = np.zeros((M,M), dtype=np.short)
+  for rowidx, row in enumerate(adjl):
+    adjl_mat[rowidx,:len(row)] = row
+
+  # Ensure arrays are C-contiguous.
+  deg = np.require(deg, requirements='C')
+  adjl_mat = np.require(adjl_mat, requirements='C')
+  return (deg, adjl_mat)
+
+def fit_etas(adj, superclusters, supervars, parallel=0):
   svids = common.extract_vids(supervars)
   R = np.array([supervars[svid]['ref_reads'] for svid in svids], dtype=np.float64)
   V = np.array([supervars[svid]['var_reads'] for svid in svids], dtype=np.float64)
@@ -48,16 +67,28 @@ def fit_etas(adj, superclusters, supervars):
   var_phi_hat = np.maximum(MIN_VARIANCE, var_phi_hat)
   assert var_phi_hat.shape == (M+1, S)
 
+  deg, adjl_mat = _make_adjl_arrays(adj)
   eta = np.zeros((M+1, S))
-  for sidx in range(S):
-    eta[:,sidx] = _fit_eta_S(adj, phi_hat[:,sidx], var_phi_hat[:,sidx])
+  if parallel > 1 and S > 1:
+    # Samples are independent given the tree, so fit them concurrently. Each
+    # worker makes the same single-sample C call as the serial loop -- only
+    # the dispatch differs -- and ctypes releases the GIL for the duration of
+    # each call, so threads suffice.
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(parallel, S)) as ex:
+      futures = [ex.submit(_fit_eta_S, deg, adjl_mat, phi_hat[:,sidx], var_phi_hat[:,sidx]) for sidx in range(S)]
+      for sidx, F in enumerate(futures):
+        eta[:,sidx] = F.result()
+  else:
+    for sidx in range(S):
+      eta[:,sidx] = _fit_eta_S(deg, adjl_mat, phi_hat[:,sidx], var_phi_hat[:,sidx])
 
   assert not np.any(np.isnan(eta))
   assert np.allclose(0, eta[eta < 0])
   eta[eta < 0] = 0
   return eta
 
-def _fit_eta_S_nancheck(adj, phi_hat, var_phi_hat):
+def _fit_eta_S_nancheck(deg, adjl_mat, phi_hat, var_phi_hat):
   # sim_K100_S100_T50_M1000_G100_run1 revealed a weird issue where a particular
   # call to _project_ppm() will return NaNs. This is reproducible insofar as
   # running Pairtree again with the same seed ("1") will cause this failure at
@@ -71,17 +102,20 @@ def _fit_eta_S_nancheck(adj, phi_hat, var_phi_hat):
   # two additional attempts.
   max_attempts = 3
   for attempt in range(max_attempts):
-    eta = _fit_eta_S_ctypes(adj, phi_hat, var_phi_hat)
+    eta = _fit_eta_S_ctypes(deg, adjl_mat, phi_hat, var_phi_hat)
     if not np.any(np.isnan(eta)):
       return eta
     print('eta contains NaN, retrying ...', file=sys.stderr)
   raise Exception('eta still contains NaN after %s attempt(s)' % max_attempts)
 
-def _project_ppm(adjm, phi_hat, var_phi_hat, root):
+def _project_ppm(deg, adjl_mat, phi_hat, var_phi_hat, root):
   assert phi_hat.ndim == var_phi_hat.ndim == 1
   inner_flag = 0
   compute_eta = 1
   M = len(phi_hat)
+  # Fit each sample with its own `T = 1` call. The library accepts `T > 1`,
+  # but its expected memory layout for that case is undocumented, so stick to
+  # the single-sample invocation.
   S = 1
   eta = np.empty(M, dtype=np.double)
   assert M >= 1
@@ -91,12 +125,6 @@ def _project_ppm(adjm, phi_hat, var_phi_hat, root):
   gamma_init = var_phi_hat
   phi_hat = phi_hat / gamma_init
 
-  adjl = _convert_adjm_to_adjlist(adjm)
-  deg = np.array([len(children) for children in adjl], dtype=np.short)
-  adjl_mat = np.zeros((M,M), dtype=np.short)
-  for rowidx, row in enumerate(adjl):
-    adjl_mat[rowidx,:len(row)] = row
-
   # Method signature:
   # realnumber tree_cost_projection(
   #   shortint inner_flag,
@@ -115,12 +143,11 @@ def _project_ppm(adjm, phi_hat, var_phi_hat, root):
   c_double_p = ctypes.POINTER(ctypes.c_double)
   c_short_p = ctypes.POINTER(ctypes.c_short)
 
-  # Ensure arrays are C-contiguous.
+  # Ensure arrays are C-contiguous. (`deg` and `adjl_mat` were already made so
+  # by `_make_adjl_arrays`.)
   eta = np.require(eta, requirements='C')
   phi_hat = np.require(phi_hat, requirements='C')
   gamma_init = np.require(gamma_init, requirements='C')
-  deg = np.require(deg, requirements='C')
-  adjl_mat = np.require(adjl_mat, requirements='C')
 
   cost = _project_ppm.tree_cost_projection(
     inner_flag,
@@ -169,14 +196,14 @@ def _init_project_ppm():
   _project_ppm.tree_cost_projection = func
 _init_project_ppm()
 
-def _fit_eta_S_ctypes(adj, phi_hat, var_phi_hat):
+def _fit_eta_S_ctypes(deg, adjl_mat, phi_hat, var_phi_hat):
   assert phi_hat.ndim == var_phi_hat.ndim == 1
   M = len(phi_hat)
   assert M >= 1
   assert var_phi_hat.shape == (M,)
   root = 0
 
-  eta = _project_ppm(adj, phi_hat, var_phi_hat, root)
+  eta = _project_ppm(deg, adjl_mat, phi_hat, var_phi_hat, root)
   return eta
 
 def _prepare_subprocess_inputs(adjm, phi, prec_sqrt):
@@ -14,7 +14,11 @@ debug = common.debug
 from common import Models, debug, NUM_MODELS
 Mutrel = mutrel.Mutrel
 
-from collections import namedtuple
+# How many sampled trees a chain accumulates before signalling the progress
+# queue.
+_PROGRESS_EVERY = 100
+
+from collections import namedtuple, OrderedDict
 TreeSample = namedtuple('TreeSample', (
   'adj',
   'anc',
@@ -22,30 +26,58 @@ TreeSample = namedtuple('TreeSample', (
   'llh_phi',
 ))
 
-def _calc_llh_phi(phi, V, N, omega_v, epsilon=1e-5):
+@njit(fastmath=True)
+def _binom_logpmf_sum(phi, V, R, omega_v, epsilon):
+  # Accumulate the non-constant part of the binomial log PMF in a single pass
+  # over the data, rather than materializing the clipped-probability and
+  # per-element log-PMF intermediates NumPy would allocate. `R = N - V` is
+  # taken precomputed, as it never changes across proposals.
+  Km1, S = V.shape
+  total = 0.
+  for i in range(Km1):
+    for j in range(S):
+      P = omega_v[i,j] * phi[i+1,j]
+      if P < epsilon:
+        P = epsilon
+      elif P > 1 - epsilon:
+        P = 1 - epsilon
+      total += V[i,j]*math.log(P) + R[i,j]*math.log1p(-P)
+  return total
+
+def _calc_llh_phi(phi, V, N, omega_v, epsilon=1e-5, logbinom=None, N_minus_V=None):
   K, S = phi.shape
   for arr in V, N, omega_v:
     assert arr.shape == (K-1, S)
-
-  assert np.allclose(1, phi[0])
-  P = omega_v * phi[1:]
-  P = np.maximum(P, epsilon)
-  P = np.minimum(P, 1 - epsilon)
-
-  phi_llh = scipy.stats.binom.logpmf(V, N, P)
-  phi_llh = np.sum(phi_llh)
+  if common.debug.DEBUG:
+    assert np.allclose(1, phi[0])
+
+  # `scipy.stats.binom.logpmf` routes every call through SciPy's generic
+  # distribution machinery (argument validation, broadcasting, frozen-dist
+  # setup), which is wasteful on the MH hot path. Evaluate the log PMF
+  # directly instead. The binomial coefficient term and `N - V` depend only on
+  # the data, so callers evaluating many trees against fixed data should
+  # compute them once (via `_calc_llh_phi_logbinom` and a single subtraction)
+  # and pass them in.
+  if logbinom is None:
+    logbinom = _calc_llh_phi_logbinom(V, N)
+  if N_minus_V is None:
+    N_minus_V = N - V
+  phi_llh = _binom_logpmf_sum(phi, V, N_minus_V, omega_v, epsilon) + logbinom
   assert not np.isnan(phi_llh)
   assert not np.isinf(phi_llh)
   return phi_llh
 
+def _calc_llh_phi_logbinom(V, N):
+  return np.sum(util.log_N_choose_K(N, V))
+
 def _init_cluster_adj_linear(K):
-  cluster_adj = np.eye(K, dtype=np.int)
+  cluster_adj = np.eye(K, dtype=np.int8)
   for k in range(1, K):
     cluster_adj[k-1,k] = 1
   return cluster_adj
 
 def _init_cluster_adj_branching(K):
-  cluster_adj = np.eye(K, dtype=np.int)
+  cluster_adj = np.eye(K, dtype=np.int8)
   # Every node comes off node 0, which will always be the tree root. Note that
   # we don't assume that the first cluster (node 1, cluster 0) is the clonal
   # cluster -- it's not treated differently from any other nodes/clusters.
@@ -53,19 +85,16 @@ def _init_cluster_adj_branching(K):
   return cluster_adj
 
 def _init_cluster_adj_random(K):
-  # Parents for nodes [1, ..., K-1].
-  parents = []
-  # Note this isn't truly random, since node i can only choose a parent <i.
-  # This prevents cycles.
-  for idx in range(1, K):
-    parents.append(np.random.randint(0, idx))
-  cluster_adj = np.eye(K, dtype=np.int)
+  # Parents for nodes [1, ..., K-1]. Note this isn't truly random, since node
+  # i can only choose a parent <i. This prevents cycles.
+  parents = np.random.randint(0, np.arange(1, K))
+  cluster_adj = np.eye(K, dtype=np.int8)
   cluster_adj[parents, range(1,K)] = 1
   return cluster_adj
 
 def _init_cluster_adj_mutrels(data_logmutrel):
   K = len(data_logmutrel.rels) + 1
-  adj = np.eye(K, dtype=np.int)
+  adj = np.eye(K, dtype=np.int8)
   in_tree = set((0,))
   remaining = set(range(1, K))
 
@@ -98,8 +127,7 @@ def _init_cluster_adj_mutrels(data_logmutrel):
       new_adj = np.copy(adj)
       new_adj[parent,nidx] = 1
       truncated_adj = util.remove_rowcol(new_adj, others)
-      tree_logmutrel = _calc_tree_logmutrel(truncated_adj, truncated_logmutrel)
-      log_W_parents[parent] = np.sum(np.triu(tree_logmutrel))
+      log_W_parents[parent] = _calc_tree_logmutrel_sum(truncated_adj, truncated_logmutrel)
     W_parents = _scaled_softmax(log_W_parents)
     assert np.all(W_parents[nodeidxs] == 0)
     pidx = _sample_cat(W_parents)
@@ -114,25 +142,39 @@ def _init_cluster_adj_mutrels(data_logmutrel):
   assert len(remaining) == 0
   return adj
 
-def _modify_tree(adj, anc, A, B):
+@njit
+def _modify_tree(adj, anc, A, B, out=None, check_validity=False):
   '''If `B` is ancestral to `A`, swap nodes `A` and `B`. Otherwise, move
   subtree `B` under `A`.
 
   `B` can't be 0 (i.e., the root node), as we want always to preserve the
-  property that node zero is root.'''
+  property that node zero is root.
+
+  This runs for every destination considered on every MH proposal, so it's
+  compiled with Numba to avoid paying NumPy dispatch overhead on each of the
+  many small array operations it performs. Callers in the hot loop can pass
+  `out` to reuse one modified-tree buffer across calls instead of allocating a
+  fresh matrix each time; `adj` itself is never mutated.'''
   K = len(adj)
   # Ensure `B` is not zero.
   assert 0 <= A < K and 0 < B < K
   assert A != B
 
-  adj = np.copy(adj)
-
-  assert np.array_equal(np.diag(adj), np.ones(K))
-  # Diagonal should be 1, and every node except one of them should have a parent.
-  assert np.sum(adj) == K + (K - 1)
-  # Every column should have two 1s in it corresponding to self & parent,
-  # except for column denoting root.
-  assert np.array_equal(np.sort(np.sum(adj, axis=0)), np.array([1] + (K - 1)*[2]))
+  if out is None:
+    adj = np.copy(adj)
+  else:
+    out[:] = adj
+    adj = out
+
+  if check_validity:
+    # By default, disable these O(K^2) checks to improve performance.
+    assert np.all(np.diag(adj) == 1)
+    # Diagonal should be 1, and every node except one of them should have a parent.
+    assert np.sum(adj) == K + (K - 1)
+    # Every column should have two 1s in it corresponding to self & parent,
+    # except for column denoting root.
+    colsums = np.sum(adj, axis=0)
+    assert np.sum(colsums == 1) == 1 and np.sum(colsums == 2) == K - 1
 
   np.fill_diagonal(adj, 0)
 
@@ -143,20 +185,25 @@ def _modify_tree(adj, anc, A, B):
       adj[B,A] = 0
 
     # Swap position in tree of A and B. I need to modify both the A and B
-    # columns.
-    acol, bcol = np.copy(adj[:,A]), np.copy(adj[:,B])
-    arow, brow = np.copy(adj[A,:]), np.copy(adj[B,:])
-    adj[A,:], adj[B,:] = brow, arow
-    adj[:,A], adj[:,B] = bcol, acol
+    # rows and columns. The four entries where they intersect are all zero at
+    # this point (the diagonal was cleared above, as were adj[B,A] and
+    # adj[A,B]), so the rows and columns can be swapped one after the other
+    # with scalar temporaries rather than taking four array copies.
+    for idx in range(K):
+      tmp = adj[A,idx]
+      adj[A,idx] = adj[B,idx]
+      adj[B,idx] = tmp
+    for idx in range(K):
+      tmp = adj[idx,A]
+      adj[idx,A] = adj[idx,B]
+      adj[idx,B] = tmp
 
     if adj_BA:
       adj[A,B] = 1
-    #debug('tree_permute', (A,B), 'swapping', A, B)
   else:
     # Move B so it becomes child of A. I don't need to modify the A column.
     adj[:,B] = 0
     adj[A,B] = 1
-    #debug('tree_permute', (A,B), 'moving', B, 'under', A)
 
   np.fill_diagonal(adj, 1)
   return adj
@@ -172,9 +219,9 @@ def calc_binom_params(supervars):
   return (V, N, omega_v)
 
 def _find_parent(node, adj):
-  col = np.copy(adj[:,node])
-  col[node] = 0
-  parents = np.flatnonzero(col)
+  # Filter out the diagonal entry rather than copying the column to zero it.
+  parents = np.flatnonzero(adj[:,node])
+  parents = parents[parents != node]
   assert len(parents) == 1
   return parents[0]
 
@@ -199,15 +246,35 @@ def _make_W_nodes_mutrel(adj, anc, data_logmutrel):
   K = len(adj)
   assert adj.shape == (K, K)
 
+  # The chain evaluates these weights for the current tree every iteration,
+  # so whenever a proposal is rejected (or a just-accepted tree was already
+  # weighted as the proposal), the same computation would repeat. Memoize per
+  # tree. The weights depend on the data as well as the tree, so include the
+  # data tensor's identity in the key -- otherwise the same adjacency seen
+  # across different datasets in one process would return stale weights. Skip
+  # the cache under debug so `node_error` reflects the current call.
+  key = None
+  if not common.debug.DEBUG:
+    key = (id(data_logmutrel), adj.tobytes())
+    cache = _make_W_nodes_mutrel.cache
+    if key in cache:
+      cache.move_to_end(key)
+      return cache[key]
+
+  # `tree_logmutrel` is a freshly allocated buffer, so compute the error terms
+  # in place rather than allocating a new (K, K) intermediate for every stage
+  # of the pipeline.
   tree_logmutrel = _calc_tree_logmutrel(adj, data_logmutrel)
-  pair_error = 1 - np.exp(tree_logmutrel)
+  pair_error = np.exp(tree_logmutrel, out=tree_logmutrel)
+  np.subtract(1, pair_error, out=pair_error)
   #pair_error *= 1 - anc
 
   assert np.allclose(0, np.diag(pair_error))
   assert np.allclose(0, pair_error[0])
   assert np.allclose(0, pair_error[:,0])
-  pair_error = np.maximum(common._EPSILON, pair_error)
-  node_error = np.sum(np.log(pair_error), axis=1)
+  np.maximum(common._EPSILON, pair_error, out=pair_error)
+  np.log(pair_error, out=pair_error)
+  node_error = np.sum(pair_error, axis=1)
   if common.debug.DEBUG:
     _make_W_nodes_mutrel.node_error = node_error
 
@@ -217,8 +284,15 @@ def _make_W_nodes_mutrel(adj, anc, data_logmutrel):
   weights /= np.sum(weights)
   assert weights[0] == 0
 
+  if key is not None:
+    cache[key] = weights
+    if len(cache) > _make_W_nodes_mutrel.cache_maxsize:
+      cache.popitem(last=False)
   return weights
 
+_make_W_nodes_mutrel.cache = OrderedDict()
+_make_W_nodes_mutrel.cache_maxsize = 1024
+
 def _make_W_nodes_uniform(adj, anc):
   K = len(adj)
   weights = np.ones(K)
@@ -232,14 +306,21 @@ def _make_data_logmutrel(mutrel):
   invalid_models = (Models.cocluster, Models.garbage)
 
   alpha = common._EPSILON
-  logrels = np.full(mutrel.rels.shape, np.nan)
+  lognorm = np.log(1 + len(valid_models)*alpha)
+  # Every plane of `logrels` is assigned below, so there's no need to
+  # initialize the allocation. Process the valid models plane by plane:
+  # basic-index slices are views, so the smoothing, log, and normalization all
+  # run in place rather than through the copies fancy indexing would make.
+  logrels = np.empty(mutrel.rels.shape)
   logrels[:,:,invalid_models] = -np.inf
-  logrels[:,:,valid_models] = np.log(mutrel.rels[:,:,valid_models] + alpha)
+  for model in valid_models:
+    plane = logrels[:,:,model]
+    np.add(mutrel.rels[:,:,model], alpha, out=plane)
+    np.log(plane, out=plane)
+    plane -= lognorm
 
   logrels[range(K),range(K),:] = -np.inf
   logrels[range(K),range(K),Models.cocluster] = 0
-
-  logrels[:,:,valid_models] -= np.log(1 + len(valid_models)*alpha)
   assert np.allclose(0, scipy.special.logsumexp(logrels, axis=2))
   assert not np.any(np.isnan(logrels))
 
@@ -247,8 +328,8 @@ def _make_data_logmutrel(mutrel):
   return logmutrel
 
 @njit
-def _calc_tree_logmutrel(adj, data_logmutrel):
-  node_rels = util.compute_node_relations(adj)
+def _calc_tree_logmutrel(adj, data_logmutrel, check_validity=False):
+  node_rels = util.compute_node_relations(adj, check_validity)
   K = len(node_rels)
   assert node_rels.shape == (K, K)
   assert data_logmutrel.rels.shape == (K-1, K-1, NUM_MODELS)
@@ -262,10 +343,88 @@ def _calc_tree_logmutrel(adj, data_logmutrel):
       JK_clustrel = node_rels[J+1,K+1]
       tree_logmutrel[J+1,K+1] = data_logmutrel.rels[J,K,JK_clustrel]
 
-  assert np.array_equal(tree_logmutrel, tree_logmutrel.T)
-  assert np.all(tree_logmutrel <= 0)
+  if check_validity:
+    # By default, disable these O(K^2) checks to improve performance.
+    assert np.array_equal(tree_logmutrel, tree_logmutrel.T)
+    assert np.all(tree_logmutrel <= 0)
   return tree_logmutrel
 
+@njit
+def _calc_tree_logmutrel_sum(adj, data_logmutrel):
+  '''Equivalent to `np.sum(np.triu(_calc_tree_logmutrel(adj,
+  data_logmutrel)))`, but accumulates the upper triangle directly rather than
+  materializing the full (K, K) matrix. Proposal weighting only needs this
+  scalar, and computes it once per candidate destination.'''
+  node_rels = util.compute_node_relations(adj)
+  K = len(node_rels)
+  assert data_logmutrel.rels.shape == (K-1, K-1, NUM_MODELS)
+
+  total = 0.
+  for J in range(K-1):
+    for I in range(J, K-1):
+      JI_clustrel = node_rels[J+1,I+1]
+      total += data_logmutrel.rels[J,I,JI_clustrel]
+  return total
+
+@njit
+def _calc_W_dests_logweights(subtree_head, curr_parent, adj, anc, data_logmutrel):
+  '''Compute `_calc_tree_logmutrel_sum` for every candidate destination of the
+  subtree headed by `subtree_head`.
+
+  Moving the subtree only changes relations between nodes inside it and nodes
+  outside it -- within-subtree and within-remainder pairs keep their labels.
+  So, rather than rebuilding each modified tree and rescoring all O(K^2)
+  pairs per destination, compute the invariant part and the per-outside-node
+  cross sums once, then assemble each destination's total in O(K). Swap
+  destinations (where `subtree_head` is ancestral to the destination)
+  rearrange relations inside the subtree as well, so those fall back to the
+  full recomputation.'''
+  K = len(adj)
+  node_rels = util.compute_node_relations(adj)
+  in_sub = anc[subtree_head] == 1
+
+  # Sum over pairs that don't cross the subtree boundary. These relations are
+  # unchanged by any non-swap move.
+  S_const = 0.
+  for J in range(1, K):
+    for I in range(J, K):
+      if in_sub[J] == in_sub[I]:
+        S_const += data_logmutrel.rels[J-1, I-1, node_rels[J,I]]
+
+  # For each node outside the subtree, sum each possible cross relation over
+  # the subtree's nodes. After a non-swap move, an outside node is either an
+  # ancestor of every subtree node (if it's the destination or one of its
+  # ancestors) or on a different branch from all of them.
+  colsum_BA = np.zeros(K)
+  colsum_DB = np.zeros(K)
+  total_DB = 0.
+  for o in range(1, K):
+    if in_sub[o]:
+      continue
+    for s in range(1, K):
+      if in_sub[s]:
+        colsum_BA[o] += data_logmutrel.rels[s-1, o-1, Models.B_A]
+        colsum_DB[o] += data_logmutrel.rels[s-1, o-1, Models.diff_branches]
+    total_DB += colsum_DB[o]
+
+  logweights = np.full(K, -np.inf)
+  new_adj = np.empty_like(adj)
+  for dest in range(K):
+    if dest == curr_parent or dest == subtree_head:
+      continue
+    if anc[subtree_head,dest]:
+      _modify_tree(adj, anc, dest, subtree_head, new_adj)
+      logweights[dest] = _calc_tree_logmutrel_sum(new_adj, data_logmutrel)
+    else:
+      cross = total_DB
+      for o in range(1, K):
+        # `anc[o,dest]` covers both `dest` itself (diagonal) and its
+        # ancestors; none of them are inside the subtree for a non-swap move.
+        if not in_sub[o] and anc[o,dest]:
+          cross += colsum_BA[o] - colsum_DB[o]
+      logweights[dest] = S_const + cross
+  return logweights
+
 def _make_W_dests_mutrel(subtree_head, curr_parent, adj, anc, data_logmutrel):
   assert subtree_head > 0
   assert adj[curr_parent,subtree_head] == 1
@@ -273,15 +432,7 @@ def _make_W_dests_mutrel(subtree_head, curr_parent, adj, anc, data_logmutrel):
   assert data_logmutrel.vids[cluster_idx] == 'S%s' % (cluster_idx + 1)
   K = len(adj)
 
-  logweights = np.full(K, -np.inf)
-  for dest in range(K):
-    if dest == curr_parent:
-      continue
-    if dest == subtree_head:
-      continue
-    new_adj = _modify_tree(adj, anc, dest, subtree_head)
-    tree_logmutrel = _calc_tree_logmutrel(new_adj, data_logmutrel)
-    logweights[dest] = np.sum(np.triu(tree_logmutrel))
+  logweights = _calc_W_dests_logweights(subtree_head, curr_parent, adj, anc, data_logmutrel)
 
   assert not np.any(np.isnan(logweights))
   valid_logweights = np.delete(logweights, (curr_parent, subtree_head))
@@ -305,8 +456,14 @@ def _make_W_dests_uniform(subtree_head, curr_parent, adj, anc):
   return weights
 
 def _sample_cat(W):
-  assert np.all(W >= 0) and np.isclose(1, np.sum(W))
-  choice = np.random.choice(len(W), p=W)
+  if common.debug.DEBUG:
+    # Every proposal samples several categorical draws, so only scan the
+    # weights for validity when debugging.
+    assert np.all(W >= 0) and np.isclose(1, np.sum(W))
+  # `np.random.choice` revalidates and renormalizes `p` on every call;
+  # `util.sample_multinom` draws the same categorical with a single jitted
+  # scan, as the clustering code already does.
+  choice = util.sample_multinom(W)
   assert W[choice] > 0
   return choice
 
@@ -324,6 +481,9 @@ def _init_chain(seed, data_logmutrel, __calc_phi, __calc_llh_phi):
   # random seed to seed a new chain, so I must ensure that the seed is still in
   # the valid range [0, 2**32).
   np.random.seed(seed % 2**32)
+  # Numba's RNG state is independent of NumPy's, so seed it too to keep the
+  # jitted categorical draws reproducible.
+  util.seed_rng(seed % 2**32)
 
   if np.random.uniform() < hparams.iota:
     init_adj = _init_cluster_adj_mutrels(data_logmutrel)
@@ -337,7 +497,7 @@ def _init_chain(seed, data_logmutrel, __calc_phi, __calc_llh_phi):
     init_adj = _init_cluster_adj_branching(K)
   common.ensure_valid_tree(init_adj)
 
-  init_anc = util.make_ancestral_from_adj(init_adj)
+  init_anc = util.make_ancestral_from_adj_cached(init_adj)
   init_phi = __calc_phi(init_adj)
 
   init_samp = TreeSample(
@@ -387,10 +547,17 @@ def _generate_new_sample(old_samp, data_logmutrel, __calc_phi, __calc_llh_phi):
   A = _sample_cat(W_dests_old[mode_dest])
   #A = _find_parent(B, common._true_adjm)
   new_adj = _modify_tree(old_samp.adj, old_samp.anc, A, B)
+  if old_samp.anc[B,A]:
+    # A swap rearranges ancestry throughout the tree, so recompute in full.
+    new_anc = util.make_ancestral_from_adj_cached(new_adj)
+  else:
+    # A subtree move only changes the ancestors of the moved subtree's nodes,
+    # so update the old ancestral matrix incrementally.
+    new_anc = util.make_ancestral_after_subtree_move(old_samp.anc, A, B, new_adj)
   new_phi = __calc_phi(new_adj)
   new_samp = TreeSample(
     adj = new_adj,
-    anc = util.make_ancestral_from_adj(new_adj),
+    anc = new_anc,
     phi = new_phi,
     llh_phi = __calc_llh_phi(new_adj, new_phi),
   )
@@ -450,16 +617,39 @@ def _run_chain(data_logmutrel, supervars, superclusters, nsamples, thinned_frac,
   assert nsamples > 0
 
   V, N, omega_v = calc_binom_params(supervars)
+  # Constants derived from the read counts never change across proposals, so
+  # compute them once per chain rather than once per likelihood evaluation.
+  logbinom = _calc_llh_phi_logbinom(V, N)
+  N_minus_V = N - V
+  # Don't warm-start each fit from the previous tree's eta, tempting though
+  # that is: it makes a structure's fitted phi depend on the chain's sampling
+  # history, and since each chain (or worker process) has its own `fit_phis`
+  # cache, two chains that sample the same structure can then record phis
+  # differing by more than the tolerance `compute_posterior` uses to check
+  # cross-chain consistency.
   def __calc_phi(adj):
     phi, eta = phi_fitter.fit_phis(adj, superclusters, supervars, method=phi_method, iterations=phi_iterations, parallel=0)
     return phi
+
+  # The chain often revisits tree structures it has already seen (e.g.,
+  # whenever a proposal is rejected and a later proposal lands back on a
+  # previous tree). The phis for a given structure are already cached in
+  # `phi_fitter.fit_phis`, so cache the corresponding LLH as well, keyed on
+  # the adjacency matrix, to avoid recomputing the binomial likelihood.
+  llh_phi_cache = {}
   def __calc_llh_phi(adj, phi):
-    return _calc_llh_phi(phi, V, N, omega_v)
+    key = adj.tobytes()
+    if key not in llh_phi_cache:
+      llh_phi_cache[key] = _calc_llh_phi(phi, V, N, omega_v, logbinom=logbinom, N_minus_V=N_minus_V)
+    return llh_phi_cache[key]
 
-  samps = [_init_chain(seed, data_logmutrel, __calc_phi, __calc_llh_phi)]
+  init_samp = _init_chain(seed, data_logmutrel, __calc_phi, __calc_llh_phi)
   accepted = 0
   if progress_queue is not None:
-    progress_queue.put(0)
+    progress_queue.put(1)
+  # Each queue put is a full IPC round-trip (pickle, pipe, unpickle), so
+  # report progress in batches rather than once per sampled tree.
+  progress_unreported = 0
 
   assert 0 < thinned_frac <= 1
   record_every = round(1 / thinned_frac)
@@ -478,10 +668,77 @@ def _run_chain(data_logmutrel, supervars, superclusters, nsamples, thinned_frac,
   # results as you'd expect.
   expected_total_trees = 1 + math.floor((nsamples - 1) / record_every)
 
-  old_samp = samps[0]
+  # We know up front how many trees the chain will record, so store them in
+  # preallocated arrays rather than growing Python lists of small arrays.
+  # This also gives `sample_trees` contiguous storage to slice when it
+  # discards burnin.
+  K = len(init_samp.adj)
+  S = init_samp.phi.shape[1]
+  adj_out = np.empty((expected_total_trees, K, K), dtype=init_samp.adj.dtype)
+  phi_out = np.empty((expected_total_trees, K, S))
+  llh_out = np.empty(expected_total_trees)
+  adj_out[0] = init_samp.adj
+  phi_out[0] = init_samp.phi
+  llh_out[0] = init_samp.llh_phi
+  recorded = 1
+
+  # Defined once, outside the sampling loop: as a closure, it reads the
+  # current values of the loop's locals (`I`, `accept`, `old_samp`, ...) at
+  # call time, so there's no need to pay for redefining it every iteration.
+  def _print_debug():
+    true_adj, true_phi = common._true_adjm, common._true_phi
+    norm_phi_llh = -old_samp.phi.size * np.log(2)
+    cols = (
+      'iter',
+      'action',
+      'old_llh',
+      'new_llh',
+      'true_llh',
+      'p_new_given_old',
+      'p_old_given_new',
+      'old_parents',
+      'new_parents',
+      'true_parents',
+      'node_error',
+      'nodes',
+      'sample_mode',
+      'W_nodes_old_0',
+      'W_nodes_old_1',
+      'W_dests_old_0',
+      'W_dests_old_1',
+      'max_W_nodes_old_1',
+      'max_W_dests_old_1',
+    )
+    vals = (
+      I,
+      'accept' if accept else 'reject',
+      '%.3f' % (old_samp.llh_phi / norm_phi_llh),
+      '%.3f' % (new_samp.llh_phi / norm_phi_llh),
+      # Call `_calc_llh_phi` directly: `__calc_llh_phi` is keyed only on the
+      # adjacency, so routing the true phi through it would poison the cache
+      # entry for the true structure with an LLH its fitted phi doesn't have.
+      '%.3f' % (_calc_llh_phi(true_phi, V, N, omega_v, logbinom=logbinom, N_minus_V=N_minus_V) / norm_phi_llh),
+      '%.3f' % log_p_new_given_old,
+      '%.3f' % log_p_old_given_new,
+      util.find_parents(old_samp.adj),
+      util.find_parents(new_samp.adj),
+      util.find_parents(true_adj),
+      _make_W_nodes_mutrel.node_error,
+    )
+    vals = vals + _generate_new_sample.debug
+    print(*['%s=%s' % (K, V) for K, V in zip(cols, vals)], sep='\t')
+
+  # Draw all the acceptance thresholds in one vectorized call instead of a
+  # scalar uniform (plus a scalar log) per iteration.
+  log_U = np.log(np.random.uniform(size=nsamples))
+
+  old_samp = init_samp
   for I in range(1, nsamples):
     if progress_queue is not None:
-      progress_queue.put(I)
+      progress_unreported += 1
+      if progress_unreported >= _PROGRESS_EVERY:
+        progress_queue.put(progress_unreported)
+        progress_unreported = 0
 
     new_samp, log_p_new_given_old, log_p_old_given_new = _generate_new_sample(
       old_samp,
@@ -490,76 +747,62 @@ def _run_chain(data_logmutrel, supervars, superclusters, nsamples, thinned_frac,
       __calc_llh_phi,
     )
     log_p_transition = (new_samp.llh_phi - old_samp.llh_phi) + (log_p_old_given_new - log_p_new_given_old)
-    U = np.random.uniform()
-    accept = log_p_transition >= np.log(U)
+    accept = log_p_transition >= log_U[I]
     if accept:
       samp = new_samp
     else:
       samp = old_samp
 
-    def _print_debug():
-      if not common.debug.DEBUG:
-        return
-      true_adj, true_phi = common._true_adjm, common._true_phi
-      norm_phi_llh = -old_samp.phi.size * np.log(2)
-      cols = (
-        'iter',
-        'action',
-        'old_llh',
-        'new_llh',
-        'true_llh',
-        'p_new_given_old',
-        'p_old_given_new',
-        'old_parents',
-        'new_parents',
-        'true_parents',
-        'node_error',
-        'nodes',
-        'sample_mode',
-        'W_nodes_old_0',
-        'W_nodes_old_1',
-        'W_dests_old_0',
-        'W_dests_old_1',
-        'max_W_nodes_old_1',
-        'max_W_dests_old_1',
-      )
-      vals = (
-        I,
-        'accept' if accept else 'reject',
-        '%.3f' % (old_samp.llh_phi / norm_phi_llh),
-        '%.3f' % (new_samp.llh_phi / norm_phi_llh),
-        '%.3f' % (__calc_llh_phi(true_adj, true_phi) / norm_phi_llh),
-        '%.3f' % log_p_new_given_old,
-        '%.3f' % log_p_old_given_new,
-        util.find_parents(old_samp.adj),
-        util.find_parents(new_samp.adj),
-        util.find_parents(true_adj),
-        _make_W_nodes_mutrel.node_error,
-      )
-      vals = vals + _generate_new_sample.debug
-      print(*['%s=%s' % (K, V) for K, V in zip(cols, vals)], sep='\t')
-    _print_debug()
+    if common.debug.DEBUG:
+      _print_debug()
 
     if I % record_every == 0:
-      samps.append(samp)
+      adj_out[recorded] = samp.adj
+      phi_out[recorded] = samp.phi
+      llh_out[recorded] = samp.llh_phi
+      recorded += 1
     old_samp = samp
     if accept:
       accepted += 1
 
+  if progress_queue is not None and progress_unreported > 0:
+    progress_queue.put(progress_unreported)
+
   if nsamples > 1:
     accept_rate = accepted / (nsamples - 1)
   else:
     accept_rate = 1.
-  assert len(samps) == expected_total_trees
-  return (
-    [S.adj     for S in samps],
-    [S.phi     for S in samps],
-    [S.llh_phi for S in samps],
-    accept_rate,
+  assert recorded == expected_total_trees
+  return (adj_out, phi_out, llh_out, accept_rate)
+
+# Chain inputs that are constant across every chain a worker process runs.
+# They're installed once per worker by `_init_chain_worker` (via the process
+# pool's initializer) so that each submitted chain doesn't re-pickle the full
+# mutrel tensor and supervariant data.
+_chain_consts = {}
+
+def _init_chain_worker(data_logmutrel, supervars, superclusters):
+  _chain_consts['data_logmutrel'] = data_logmutrel
+  _chain_consts['supervars'] = supervars
+  _chain_consts['superclusters'] = superclusters
+
+def _run_chain_worker(nsamples, thinned_frac, phi_method, phi_iterations, seed, progress_queue):
+  return _run_chain(
+    _chain_consts['data_logmutrel'],
+    _chain_consts['supervars'],
+    _chain_consts['superclusters'],
+    nsamples,
+    thinned_frac,
+    phi_method,
+    phi_iterations,
+    seed,
+    progress_queue,
   )
 
 def use_existing_structures(adjms, supervars, superclusters, phi_method, phi_iterations, parallel=0):
   V, N, omega_v = calc_binom_params(supervars)
+  logbinom = _calc_llh_phi_logbinom(V, N)
+  N_minus_V = N - V
   K = len(supervars)
   phis = []
   llhs = []
@@ -567,7 +810,7 @@ def use_existing_structures(adjms, supervars, superclusters, phi_method, phi_ite
   for adjm in adjms:
     assert adjm.shape == (K+1, K+1)
     phi, eta = phi_fitter.fit_phis(adjm, superclusters, supervars, method=phi_method, iterations=phi_iterations, parallel=parallel)
-    llh = _calc_llh_phi(phi, V, N, omega_v)
+    llh = _calc_llh_phi(phi, V, N, omega_v, logbinom=logbinom, N_minus_V=N_minus_V)
     phis.append(phi)
     llhs.append(llh)
   return (np.array(adjms), np.array(phis), np.array(llhs))
@@ -584,6 +827,9 @@ def sample_trees(data_mutrel, supervars, superclusters, trees_per_chain, burnin,
   jobs = []
   total = nchains * trees_per_chain
   data_logmutrel = _make_data_logmutrel(data_mutrel)
+  # The cache key includes `id(data_logmutrel)`, but a freed tensor's id can
+  # be reused by a later run's, so drop any entries from previous runs.
+  _make_W_nodes_mutrel.cache.clear()
 
   # Don't use (hard-to-debug) parallelism machinery unless necessary.
   if parallel > 0:
@@ -600,11 +846,18 @@ def sample_trees(data_mutrel, supervars, superclusters, trees_per_chain, burnin,
     progress_queue = manager.Queue()
 
     with progressbar(total=total, desc='Sampling trees', unit='tree', dynamic_ncols=True) as pbar:
-      with concurrent.futures.ProcessPoolExecutor(max_workers=parallel) as ex:
+      # The mutrel tensor and supervariant data are identical for every chain,
+      # so send them to each worker once through the pool initializer rather
+      # than pickling them into every submitted job.
+      with concurrent.futures.ProcessPoolExecutor(
+        max_workers = parallel,
+        initializer = _init_chain_worker,
+        initargs = (data_logmutrel, supervars, superclusters),
+      ) as ex:
         for C in range(nchains):
           # Ensure each chain's random seed is different from the seed used to
           # seed the initial Pairtree invocation, yet nonetheless reproducible.
-          jobs.append(ex.submit(_run_chain, data_logmutrel, supervars, superclusters, trees_per_chain, thinned_frac, phi_method, phi_iterations, seed + C + 1, progress_queue))
+          jobs.append(ex.submit(_run_chain_worker, trees_per_chain, thinned_frac, phi_method, phi_iterations, seed + C + 1, progress_queue))
 
         while True:
           finished = 0
@@ -649,9 +902,9 @@ def sample_trees(data_mutrel, supervars, superclusters, trees_per_chain, burnin,
           while time.perf_counter() - last_check < 5:
             try:
               # If there's something in the queue for us to retrieve, a child
-              # process has sampled a tree.
-              progress_queue.get(timeout=5)
-              pbar.update()
+              # process has sampled a batch of trees. The value indicates how
+              # many trees the batch contains.
+              pbar.update(progress_queue.get(timeout=5))
             except queue.Empty:
               pass
 
@@ -668,10 +921,17 @@ def sample_trees(data_mutrel, supervars, superclusters, trees_per_chain, burnin,
   for A, P, L, accept_rate in results:
     assert len(A) == len(P) == len(L) == len(results[0][0])
     discard_first = round(burnin * len(A))
-    merged_adj += A[discard_first:]
-    merged_phi += P[discard_first:]
-    merged_llh += L[discard_first:]
+    merged_adj.append(A[discard_first:])
+    merged_phi.append(P[discard_first:])
+    merged_llh.append(L[discard_first:])
     accept_rates.append(accept_rate)
+  # Since each chain returns contiguous arrays, concatenating the post-burnin
+  # slices gives single contiguous buffers (matching what
+  # `use_existing_structures` returns) rather than Python lists of per-tree
+  # arrays.
+  merged_adj = np.concatenate(merged_adj)
+  merged_phi = np.concatenate(merged_phi)
+  merged_llh = np.concatenate(merged_llh)
   assert len(merged_adj) == len(merged_phi) == len(merged_llh)
   return (merged_adj, merged_phi, merged_llh, accept_rates)
 
@@ -1,5 +1,6 @@
 import numpy as np
 import time
+from collections import OrderedDict
 from numba import njit, vectorize
 from common import Models
 import common
@@ -55,6 +56,14 @@ def sample_multinom(probs):
   # Should not reach this point.
   assert False
 
+@njit
+def seed_rng(seed):
+  # Numba maintains an RNG state separate from NumPy's, so callers relying on
+  # jitted samplers like `sample_multinom` being reproducible must seed
+  # through jitted code as well -- a Python-level `np.random.seed` doesn't
+  # touch it.
+  np.random.seed(seed)
+
 @njit
 def isclose(arr, V, tol=1e-6):
   # This is a poor person's version of `np.isclose`. Once Numba implements
@@ -192,6 +201,58 @@ def make_ancestral_from_adj(adj, check_validity=False):
     assert np.array_equal(Z[root], np.ones(K))
   return Z
 
+@njit
+def _update_ancestral_after_move(old_anc, A, B):
+  K = len(old_anc)
+  new_anc = np.copy(old_anc)
+  for c in range(K):
+    # Only the subtree headed by `B` gains or loses ancestors; ancestry of
+    # every other node is untouched by the move.
+    if old_anc[B,c]:
+      for r in range(K):
+        # `r` is an ancestor of `c` afterward iff it's `A` or one of `A`'s
+        # ancestors (`old_anc[r,A]` covers both, via the diagonal), or it was
+        # already an ancestor of `c` within the subtree.
+        new_anc[r,c] = old_anc[r,A] or (old_anc[B,r] and old_anc[r,c])
+  return new_anc
+
+def make_ancestral_after_subtree_move(old_anc, A, B, new_adj):
+  '''Derive the ancestral matrix for the tree produced by moving the subtree
+  headed by `B` (which must not be ancestral to `A`) under new parent `A`,
+  given the old tree's ancestral matrix. Only the subtree's columns change,
+  so this is O(|subtree| * K) rather than a full traversal. The result goes
+  through the same cache as `make_ancestral_from_adj_cached`, so callers must
+  likewise treat it as read-only.'''
+  assert not old_anc[B,A]
+  key = new_adj.tobytes()
+  cache = make_ancestral_from_adj_cached.cache
+  if key not in cache:
+    cache[key] = _update_ancestral_after_move(old_anc, A, B)
+    if len(cache) > make_ancestral_from_adj_cached.cache_maxsize:
+      cache.popitem(last=False)
+  else:
+    cache.move_to_end(key)
+  return cache[key]
+
+def make_ancestral_from_adj_cached(adj):
+  '''Memoized front-end to `make_ancestral_from_adj`, keyed on the bytes of
+  the adjacency matrix. Within a single MH iteration, both the tree sampler
+  and the phi fitter need the ancestral matrix for the same adjacency, so
+  share one computation between them. Callers must treat the returned matrix
+  as read-only.'''
+  key = adj.tobytes()
+  cache = make_ancestral_from_adj_cached.cache
+  if key not in cache:
+    cache[key] = make_ancestral_from_adj(adj)
+    if len(cache) > make_ancestral_from_adj_cached.cache_maxsize:
+      cache.popitem(last=False)
+  else:
+    cache.move_to_end(key)
+  return cache[key]
+
+make_ancestral_from_adj_cached.cache = OrderedDict()
+make_ancestral_from_adj_cached.cache_maxsize = 1024
+
 @njit
 def compute_node_relations(adj, check_validity=False):
   K = len(adj)
@@ -205,8 +266,10 @@ def compute_node_relations(adj, check_validity=False):
   np.fill_diagonal(R, Models.cocluster)
 
   if check_validity:
-    assert np.all(R[0]   == Models.A_B)
-    assert np.all(R[:,0] == Models.B_A)
+    # The root is ancestral to every other node. (The diagonal is always
+    # `cocluster`, so exclude it.)
+    assert np.all(R[0][1:]   == Models.A_B)
+    assert np.all(R[1:,0] == Models.B_A)
   return R
 
 def calc_eta(struct, phi):